@@ -3,14 +3,15 @@ Package for processing with autoRIFT
 """
 
 import argparse
+import functools
 import json
 import logging
-import os
 import shutil
-import xml.etree.ElementTree as ET
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import Callable, Literal, Optional, Tuple
+from typing import BinaryIO, Callable, Literal, Optional, Tuple
 
 import boto3
 import botocore.exceptions
@@ -18,6 +19,7 @@ import numpy as np
 import requests
 from hyp3lib.aws import upload_file_to_s3
 from hyp3lib.image import create_thumbnail
+from lxml import etree
 from netCDF4 import Dataset
 from osgeo import gdal
 
@@ -30,6 +32,9 @@ gdal.UseExceptions()
 
 S3_CLIENT = boto3.client('s3')
 
+# requests doesn't guarantee a Session is thread-safe, so each thread gets its own
+_HTTP_SESSIONS = threading.local()
+
 LC2_SEARCH_URL = 'https://landsatlook.usgs.gov/stac-server/collections/landsat-c2l1/items'
 LANDSAT_BUCKET = 'usgs-landsat'
 LANDSAT_SENSOR_MAPPING = {
@@ -43,6 +48,9 @@ LANDSAT_SENSOR_MAPPING = {
 DEFAULT_PARAMETER_FILE = '/vsicurl/http://its-live-data.s3.amazonaws.com/' \
                          'autorift_parameters/v001/autorift_landice_0120m.shp'
 
+# enough to cover the IFDs and tile offsets at the start of a Landsat COG
+PREFETCH_HEADER_SIZE = 1024 * 1024
+
 PLATFORM_SHORTNAME_LONGNAME_MAPPING = {
     'S1': 'sentinel1',
     'S2': 'sentinel2',
@@ -65,8 +73,18 @@ def get_lc2_stac_json_key(scene_name: str) -> str:
     return f'collection02/level-1/standard/{sensor}/{year}/{path}/{row}/{scene_name}/{scene_name}_stac.json'
 
 
+def _get_http_session() -> requests.Session:
+    # reuse connections across the metadata requests made from the same thread
+    session = getattr(_HTTP_SESSIONS, 'session', None)
+    if session is None:
+        session = requests.Session()
+        session.mount('https://', requests.adapters.HTTPAdapter(pool_connections=8, pool_maxsize=16))
+        _HTTP_SESSIONS.session = session
+    return session
+
+
 def get_lc2_metadata(scene_name: str) -> dict:
-    response = requests.get(f'{LC2_SEARCH_URL}/{scene_name}')
+    response = _get_http_session().get(f'{LC2_SEARCH_URL}/{scene_name}')
     try:
         response.raise_for_status()
         return response.json()
@@ -94,25 +112,56 @@ def get_lc2_path(metadata: dict) -> str:
     return band['href'].replace('https://landsatlook.usgs.gov/data/', f'/vsis3/{LANDSAT_BUCKET}/')
 
 
+def _prefetch_raster_header(path: str, size: int = PREFETCH_HEADER_SIZE):
+    # Best effort: reading the start of a remote COG puts its header in GDAL's /vsicurl/ block cache,
+    # so the later open doesn't pay for the round trips; any real access problem surfaces on that open
+    try:
+        handle = gdal.VSIFOpenL(path, 'rb')
+        if handle is None:
+            return
+        try:
+            gdal.VSIFReadL(1, size, handle)
+        finally:
+            gdal.VSIFCloseL(handle)
+    except RuntimeError as e:
+        log.debug(f'Unable to prefetch the header of {path}: {e}')
+
+
+def _get_lc2_metadata_and_prefetch(scene_name: str) -> dict:
+    metadata = get_lc2_metadata(scene_name)
+    _prefetch_raster_header(get_lc2_path(metadata))
+    return metadata
+
+
 def get_s2_safe_url(scene_name):
     root_url = 'https://storage.googleapis.com/gcp-public-data-sentinel-2/tiles'
     tile = f'{scene_name[39:41]}/{scene_name[41:42]}/{scene_name[42:44]}'
     return f'{root_url}/{tile}/{scene_name}.SAFE'
 
 
-def get_s2_manifest(scene_name):
+def get_s2_manifest(scene_name) -> BinaryIO:
     safe_url = get_s2_safe_url(scene_name)
     manifest_url = f'{safe_url}/manifest.safe'
-    response = requests.get(manifest_url)
+    response = _get_http_session().get(manifest_url, stream=True)
     response.raise_for_status()
-    return response.text
+    response.raw.decode_content = True
+    return response.raw
 
 
-def get_s2_path(manifest_text: str, scene_name: str) -> str:
-    root = ET.fromstring(manifest_text)
-    elements = root.findall(".//fileLocation[@locatorType='URL'][@href]")
-    hrefs = [element.attrib['href'] for element in elements if
-             element.attrib['href'].endswith('_B08.jp2') and '/IMG_DATA/' in element.attrib['href']]
+def get_s2_path(manifest: BinaryIO, scene_name: str) -> str:
+    hrefs = []
+    for _, element in etree.iterparse(manifest):
+        if element.tag == 'fileLocation':
+            href = element.get('href', '')
+            if element.get('locatorType') == 'URL' and href.endswith('_B08.jp2') and '/IMG_DATA/' in href:
+                hrefs.append(href)
+
+        # Only the matching hrefs are needed, so drop every element (and its finished siblings) once it's parsed;
+        # the tree then only holds the path to the current element plus whatever the parser has read ahead
+        element.clear(keep_tail=True)
+        while element.getprevious() is not None:
+            del element.getparent()[0]
+
     if len(hrefs) == 1:
         # post-2016-12-06 scene; only one tile
         file_path = hrefs[0]
@@ -124,18 +173,30 @@ def get_s2_path(manifest_text: str, scene_name: str) -> str:
     return f'/vsicurl/{safe_url}/{file_path}'
 
 
+def _get_wgs84_extent(path: str) -> Tuple[Tuple[float, float], ...]:
+    info = gdal.Info(path, format='json', showFileList=False, showMetadata=False, showRAT=False, showColorTable=False)
+    return tuple(tuple(coord) for coord in info['wgs84Extent']['coordinates'][0])
+
+
+# Remote scenes don't change, so only read their headers once per process; local files may be rewritten
+_get_remote_wgs84_extent = functools.lru_cache(maxsize=32)(_get_wgs84_extent)
+
+
 def get_raster_bbox(path: str):
-    info = gdal.Info(path, format='json')
-    coordinates = info['wgs84Extent']['coordinates'][0]
-    lons = [coord[0] for coord in coordinates]
-    lats = [coord[1] for coord in coordinates]
-    if max(lons) >= 170 and min(lons) <= -170:
-        lons = [lon - 360 if lon >= 170 else lon for lon in lons]
+    if path.startswith('/vsi'):
+        extent = _get_remote_wgs84_extent(path)
+    else:
+        extent = _get_wgs84_extent(path)
+    coordinates = np.asarray(extent, dtype=np.float64)
+    lons = coordinates[:, 0]
+    lats = coordinates[:, 1]
+    if lons.max() >= 170 and lons.min() <= -170:
+        lons = np.where(lons >= 170, lons - 360, lons)
     return [
-        min(lons),
-        min(lats),
-        max(lons),
-        max(lats),
+        float(lons.min()),
+        float(lats.min()),
+        float(lons.max()),
+        float(lats.max()),
     ]
 
 
@@ -180,6 +241,7 @@ def least_precise_orbit_of(orbits):
     return 'P'
 
 
+@functools.lru_cache(maxsize=256)
 def get_datetime(scene_name):
     if 'BURST' in scene_name:
         return datetime.strptime(scene_name[14:29], '%Y%m%dT%H%M%S')
@@ -195,6 +257,7 @@ def get_datetime(scene_name):
     raise ValueError(f'Unsupported scene format: {scene_name}')
 
 
+@functools.lru_cache(maxsize=256)
 def get_platform(scene: str) -> str:
     if 'BURST' in scene:
         return 'GS1'
@@ -214,20 +277,27 @@ def create_filtered_filepath(path: str) -> str:
 
 
 def prepare_array_for_filtering(array: np.ndarray, nodata: int) -> Tuple[np.ndarray, np.ndarray]:
+    # compare in the input dtype, then cast the valid pixels straight into the (zeroed) float32 output
     valid_domain = array != nodata
-    array[~valid_domain] = 0
-    return array.astype(np.float32), valid_domain
+    if valid_domain.all():
+        return array.astype(np.float32, copy=False), valid_domain
+
+    prepared = np.zeros(array.shape, dtype=np.float32)
+    np.copyto(prepared, array, casting='unsafe', where=valid_domain)
+    return prepared, valid_domain
 
 
 def apply_fft_filter(array: np.ndarray, nodata: int) -> Tuple[np.ndarray, None]:
     from autoRIFT.autoRIFT import _fft_filter, _wallis_filter
 
     array, valid_domain = prepare_array_for_filtering(array, nodata)
+    invalid_domain = ~valid_domain
+
     wallis = _wallis_filter(array, filter_width=5)
-    wallis[~valid_domain] = 0
+    np.putmask(wallis, invalid_domain, 0)
 
     filtered = _fft_filter(wallis, valid_domain, power_threshold=500)
-    filtered[~valid_domain] = 0
+    np.putmask(filtered, invalid_domain, 0)
 
     return filtered, None
 
@@ -247,7 +317,6 @@ def apply_wallis_nodata_fill_filter(array: np.ndarray, nodata: int) -> Tuple[np.
 
 def _apply_filter_function(image_path: str, filter_function: Callable) -> Tuple[str, Optional[str]]:
     image_array, image_transform, image_projection, _, image_nodata = utils.load_geospatial(image_path)
-    image_array = image_array.astype(np.float32)
 
     image_filtered, zero_mask = filter_function(image_array, image_nodata)
 
@@ -288,8 +357,12 @@ def apply_landsat_filtering(reference_path: str, secondary_path: str) \
     if reference_filter != secondary_filter:
         raise NotImplementedError('AutoRIFT not available for image pairs with different preprocessing methods')
 
-    reference_path, reference_zero_path = _apply_filter_function(reference_path, reference_filter)
-    secondary_path, secondary_zero_path = _apply_filter_function(secondary_path, secondary_filter)
+    # the reads, filters, and writes are mostly GDAL/numpy/FFT work outside the GIL, so run both scenes at once
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        reference_future = executor.submit(_apply_filter_function, reference_path, reference_filter)
+        secondary_future = executor.submit(_apply_filter_function, secondary_path, secondary_filter)
+        reference_path, reference_zero_path = reference_future.result()
+        secondary_path, secondary_zero_path = secondary_future.result()
 
     return reference_path, reference_zero_path, secondary_path, secondary_zero_path
 
@@ -369,74 +442,66 @@ def process(
         from hyp3_autorift.s1_isce3 import process_burst_sentinel1_with_isce3_radar
         netcdf_file = process_burst_sentinel1_with_isce3_radar(reference, secondary)
     else:
-        # Set config and env for new CXX threads in Geogrid/autoRIFT
-        gdal.SetConfigOption('GDAL_DISABLE_READDIR_ON_OPEN', 'EMPTY_DIR')
-        os.environ['GDAL_DISABLE_READDIR_ON_OPEN'] = 'EMPTY_DIR'
-
-        gdal.SetConfigOption('AWS_REGION', 'us-west-2')
-        os.environ['AWS_REGION'] = 'us-west-2'
-
-        if platform == 'S2':
-            reference_metadata = get_s2_metadata(reference)
-            reference_path = reference_metadata['path']
-
-            secondary_metadata = get_s2_metadata(secondary)
-            secondary_path = secondary_metadata['path']
-
-        elif 'L' in platform:
-            # Set config and env for new CXX threads in Geogrid/autoRIFT
-            gdal.SetConfigOption('AWS_REQUEST_PAYER', 'requester')
-            os.environ['AWS_REQUEST_PAYER'] = 'requester'
-
-            reference_metadata = get_lc2_metadata(reference)
-            reference_path = get_lc2_path(reference_metadata)
-
-            secondary_metadata = get_lc2_metadata(secondary)
-            secondary_path = get_lc2_path(secondary_metadata)
-
-            filter_platform = min([platform, get_platform(secondary)])
-            if filter_platform in ('L4', 'L5', 'L7'):
-                # Log path here before we transform it
-                log.info(f'Reference scene path: {reference_path}')
-                log.info(f'Secondary scene path: {secondary_path}')
-                reference_path, reference_zero_path, secondary_path, secondary_zero_path = \
-                    apply_landsat_filtering(reference_path, secondary_path)
-
-            if reference_metadata['properties']['proj:epsg'] != secondary_metadata['properties']['proj:epsg']:
-                log.info('Reference and secondary projections are different! Reprojecting.')
-
-                # Reproject zero masks if necessary
-                if reference_zero_path and secondary_zero_path:
-                    _, _ = utils.ensure_same_projection(reference_zero_path, secondary_zero_path)
-
-                reference_path, secondary_path = utils.ensure_same_projection(reference_path, secondary_path)
-
-        bbox = reference_metadata['bbox']
-        lat_limits = (bbox[1], bbox[3])
-        lon_limits = (bbox[0], bbox[2])
-
-        log.info(f'Reference scene path: {reference_path}')
-        log.info(f'Secondary scene path: {secondary_path}')
-
-        scene_poly = geometry.polygon_from_bbox(x_limits=lat_limits, y_limits=lon_limits)
-        parameter_info = utils.find_jpl_parameter_info(scene_poly, parameter_file)
-
-        from hyp3_autorift.vend.testGeogridOptical import (
-            coregisterLoadMetadata, runGeogrid)
-        meta_r, meta_s = coregisterLoadMetadata(
-            reference_path, secondary_path,
-            reference_metadata=reference_metadata,
-            secondary_metadata=secondary_metadata,
-        )
-        geogrid_info = runGeogrid(meta_r, meta_s, epsg=parameter_info['epsg'], **parameter_info['geogrid'])
-
-        from hyp3_autorift.vend.testautoRIFT import generateAutoriftProduct
-        netcdf_file = generateAutoriftProduct(
-            reference_path, secondary_path, nc_sensor=platform, optical_flag=True, ncname=None,
-            reference_metadata=reference_metadata, secondary_metadata=secondary_metadata,
-            geogrid_run_info=geogrid_info, **parameter_info['autorift'],
-            parameter_file=DEFAULT_PARAMETER_FILE.replace('/vsicurl/', ''),
-        )
+        with utils.gdal_config_options(utils.OPTICAL_GDAL_CONFIG):
+            if platform == 'S2':
+                reference_metadata = get_s2_metadata(reference)
+                reference_path = reference_metadata['path']
+
+                secondary_metadata = get_s2_metadata(secondary)
+                secondary_path = secondary_metadata['path']
+
+            elif 'L' in platform:
+                with ThreadPoolExecutor(max_workers=2) as executor:
+                    reference_metadata, secondary_metadata = executor.map(
+                        _get_lc2_metadata_and_prefetch, (reference, secondary)
+                    )
+
+                reference_path = get_lc2_path(reference_metadata)
+                secondary_path = get_lc2_path(secondary_metadata)
+
+                filter_platform = min([platform, get_platform(secondary)])
+                if filter_platform in ('L4', 'L5', 'L7'):
+                    # Log path here before we transform it
+                    log.info(f'Reference scene path: {reference_path}')
+                    log.info(f'Secondary scene path: {secondary_path}')
+                    reference_path, reference_zero_path, secondary_path, secondary_zero_path = \
+                        apply_landsat_filtering(reference_path, secondary_path)
+
+                if reference_metadata['properties']['proj:epsg'] != secondary_metadata['properties']['proj:epsg']:
+                    log.info('Reference and secondary projections are different! Reprojecting.')
+
+                    # Reproject zero masks if necessary
+                    if reference_zero_path and secondary_zero_path:
+                        _, _ = utils.ensure_same_projection(reference_zero_path, secondary_zero_path)
+
+                    reference_path, secondary_path = utils.ensure_same_projection(reference_path, secondary_path)
+
+            bbox = reference_metadata['bbox']
+            lat_limits = (bbox[1], bbox[3])
+            lon_limits = (bbox[0], bbox[2])
+
+            log.info(f'Reference scene path: {reference_path}')
+            log.info(f'Secondary scene path: {secondary_path}')
+
+            scene_poly = geometry.polygon_from_bbox(x_limits=lat_limits, y_limits=lon_limits)
+            parameter_info = utils.find_jpl_parameter_info(scene_poly, parameter_file)
+
+            from hyp3_autorift.vend.testGeogridOptical import (
+                coregisterLoadMetadata, runGeogrid)
+            meta_r, meta_s = coregisterLoadMetadata(
+                reference_path, secondary_path,
+                reference_metadata=reference_metadata,
+                secondary_metadata=secondary_metadata,
+            )
+            geogrid_info = runGeogrid(meta_r, meta_s, epsg=parameter_info['epsg'], **parameter_info['geogrid'])
+
+            from hyp3_autorift.vend.testautoRIFT import generateAutoriftProduct
+            netcdf_file = generateAutoriftProduct(
+                reference_path, secondary_path, nc_sensor=platform, optical_flag=True, ncname=None,
+                reference_metadata=reference_metadata, secondary_metadata=secondary_metadata,
+                geogrid_run_info=geogrid_info, **parameter_info['autorift'],
+                parameter_file=DEFAULT_PARAMETER_FILE.replace('/vsicurl/', ''),
+            )
 
     if netcdf_file is None:
         raise Exception('Processing failed! Output netCDF file not found')
@@ -459,7 +524,10 @@ def process(
 
     with Dataset(product_file) as nc:
         velocity = nc.variables['v']
-        data = np.ma.masked_values(velocity, -32767.).filled(0)
+        # read the raw values rather than a masked array, then zero the nodata in place
+        velocity.set_auto_mask(False)
+        data = velocity[:]
+        np.putmask(data, data == -32767, 0)
 
     browse_file = product_file.with_suffix('.png')
     image.make_browse(browse_file, data)
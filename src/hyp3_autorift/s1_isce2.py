@@ -1,8 +1,11 @@
 import copy
+import functools
+import itertools
 import logging
 import os
 import sys
 import textwrap
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import List
@@ -36,18 +39,26 @@ def process_sentinel1_with_isce2(reference, secondary, parameter_file):
     from hyp3_autorift.vend.testGeogrid_ISCE import loadMetadata, runGeogrid
     from hyp3_autorift.vend.testautoRIFT_ISCE import generateAutoriftProduct
 
-    for scene in [reference, secondary]:
-        scene_url = get_download_url(scene)
-        download_file(scene_url, chunk_size=5242880)
-
     orbits = Path('Orbits').resolve()
     orbits.mkdir(parents=True, exist_ok=True)
 
-    reference_state_vec = fetch_for_scene(reference, dir=orbits)
-    log.info(f'Downloaded orbit file {reference_state_vec} from s1-orbits')
+    # The scene and orbit downloads are independent and network bound, so run them all at once
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        scene_downloads = [
+            executor.submit(download_file, get_download_url(scene), chunk_size=5242880)
+            for scene in [reference, secondary]
+        ]
+        reference_orbit_download = executor.submit(fetch_for_scene, reference, dir=orbits)
+        secondary_orbit_download = executor.submit(fetch_for_scene, secondary, dir=orbits)
+
+        reference_state_vec = reference_orbit_download.result()
+        log.info(f'Downloaded orbit file {reference_state_vec} from s1-orbits')
 
-    secondary_state_vec = fetch_for_scene(secondary, dir=orbits)
-    log.info(f'Downloaded orbit file {secondary_state_vec} from s1-orbits')
+        secondary_state_vec = secondary_orbit_download.result()
+        log.info(f'Downloaded orbit file {secondary_state_vec} from s1-orbits')
+
+        for scene_download in scene_downloads:
+            scene_download.result()
 
     polarization = get_s1_primary_polarization(reference)
     lat_limits, lon_limits = bounding_box(f'{reference}.zip', polarization=polarization, orbits=str(orbits))
@@ -65,8 +76,12 @@ def process_sentinel1_with_isce2(reference, secondary, parameter_file):
     reference_path = os.path.join(os.getcwd(), 'merged', 'reference.slc.full')
     secondary_path = os.path.join(os.getcwd(), 'merged', 'secondary.slc.full')
 
-    for slc in [reference_path, secondary_path]:
-        gdal.Translate(slc, f'{slc}.vrt', format='ENVI')
+    # GDAL releases the GIL during block I/O, so write both SLCs at once
+    translate_options = gdal.TranslateOptions(format='ENVI')
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        list(executor.map(
+            lambda slc: gdal.Translate(slc, f'{slc}.vrt', options=translate_options), [reference_path, secondary_path]
+        ))
 
     meta_r = loadMetadata('fine_coreg')
     meta_s = loadMetadata('secondary')
@@ -406,6 +421,16 @@ def format_tops_xml(reference, secondary, polarization, dem, orbits, xml_file='t
         f.write(textwrap.dedent(xml_template))
 
 
+@functools.lru_cache(maxsize=1)
+def _isce_classes():
+    """Import the ISCE classes needed by `bounding_box` once per process"""
+    import isce  # noqa: F401
+    from contrib.geo_autoRIFT.geogrid import Geogrid
+    from isceobj.Orbit.Orbit import Orbit
+    from isceobj.Sensor.TOPS.Sentinel1 import Sentinel1
+    return Geogrid, Orbit, Sentinel1
+
+
 def bounding_box(safe, priority='reference', polarization='hh', orbits='Orbits', epsg=4326):
     """Determine the geometric bounding box of a Sentinel-1 image
 
@@ -419,10 +444,7 @@ def bounding_box(safe, priority='reference', polarization='hh', orbits='Orbits',
         lat_limits: list containing the [minimum, maximum] latitudes
         lat_limits: list containing the [minimum, maximum] longitudes
     """
-    import isce  # noqa: F401
-    from contrib.geo_autoRIFT.geogrid import Geogrid
-    from isceobj.Orbit.Orbit import Orbit
-    from isceobj.Sensor.TOPS.Sentinel1 import Sentinel1
+    Geogrid, Orbit, Sentinel1 = _isce_classes()
     frames = []
     for swath in range(1, 4):
         rdr = Sentinel1()
@@ -450,11 +472,16 @@ def bounding_box(safe, priority='reference', polarization='hh', orbits='Orbits',
     for state_vector in first_burst.orbit:
         orb.addStateVector(state_vector)
 
-    for frame in frames:
-        for burst in frame.bursts:
-            for state_vector in burst.orbit:
-                if state_vector.time < orb.minTime or state_vector.time > orb.maxTime:
-                    orb.addStateVector(state_vector)
+    state_vectors = [state_vector for frame in frames for burst in frame.bursts for state_vector in burst.orbit]
+    times = np.array([state_vector.time for state_vector in state_vectors], dtype='datetime64[us]')
+
+    # bursts share most of their state vectors, so only keep the first occurrence of each time
+    is_new = np.zeros(times.shape, dtype=bool)
+    is_new[np.unique(times, return_index=True)[1]] = True
+    is_new &= (times < np.datetime64(orb.minTime, 'us')) | (times > np.datetime64(orb.maxTime, 'us'))
+
+    for state_vector in itertools.compress(state_vectors, is_new):
+        orb.addStateVector(state_vector)
 
     obj = Geogrid()
     obj.configure()
@@ -464,8 +491,8 @@ def bounding_box(safe, priority='reference', polarization='hh', orbits='Orbits',
     obj.sensingStart = sensing_start
     obj.prf = prf
     obj.lookSide = -1
-    obj.numberOfLines = int(np.round((sensing_stop - sensing_start).total_seconds() * prf))
-    obj.numberOfSamples = int(np.round((far_range - starting_range)/range_pixel_size))
+    obj.numberOfLines = round((sensing_stop - sensing_start).total_seconds() * prf)
+    obj.numberOfSamples = round((far_range - starting_range)/range_pixel_size)
     obj.orbit = orb
     obj.epsg = epsg
 
@@ -496,18 +523,20 @@ def prep_isce_dem(input_dem, lat_limits, lon_limits, isce_dem=None):
     warp_options = gdal.WarpOptions(
         format='ENVI', outputType=gdal.GDT_Int16, resampleAlg='cubic',
         xRes=0.001, yRes=0.001, dstSRS='EPSG:4326', dstNodata=0,
-        outputBounds=[lon_limits[0], lat_limits[0], lon_limits[1], lat_limits[1]]
+        outputBounds=[lon_limits[0], lat_limits[0], lon_limits[1], lat_limits[1]],
+        multithread=True, warpOptions=['NUM_THREADS=ALL_CPUS'], warpMemoryLimit=512 * 1024 * 1024,
     )
-    gdal.Warp(isce_dem, in_ds, options=warp_options)
+    isce_ds = gdal.Warp(isce_dem, in_ds, options=warp_options)
 
     del in_ds
 
-    isce_ds = gdal.Open(isce_dem, gdal.GA_ReadOnly)
     isce_trans = isce_ds.GetGeoTransform()
+    width, length = isce_ds.RasterXSize, isce_ds.RasterYSize
+    del isce_ds
 
     img = isceobj.createDemImage()
-    img.width = isce_ds.RasterXSize
-    img.length = isce_ds.RasterYSize
+    img.width = width
+    img.length = length
     img.bands = 1
     img.dataType = 'SHORT'
     img.scheme = 'BIL'
@@ -4,6 +4,7 @@ import math
 import netrc
 import os
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from pathlib import Path
 from platform import system
@@ -145,9 +146,13 @@ def process_burst_sentinel1_with_isce3_radar(burst_granule_ref, burst_granule_se
 
 
 def process_sentinel1_with_isce3_slc(slc_ref, slc_sec):
-    for scene in [slc_ref, slc_sec]:
-        scene_url = get_download_url(scene)
-        download_file(scene_url, chunk_size=5242880)
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        scene_downloads = [
+            executor.submit(download_file, get_download_url(scene), chunk_size=5242880)
+            for scene in [slc_ref, slc_sec]
+        ]
+        for scene_download in scene_downloads:
+            scene_download.result()
 
     safe_ref = sorted(glob.glob('./*.zip'))[0]
     safe_sec = sorted(glob.glob('./*.zip'))[1]
@@ -160,10 +165,11 @@ def process_sentinel1_with_isce3_slc(slc_ref, slc_sec):
     bounds = [lon_min, lat_min, lon_max, lat_max]
     download_dem(bounds)
 
-    orbit_file_ref = fetch_for_scene(safe_ref, dir='./')
-    orbit_file_ref = orbit_file_ref.name
-    orbit_file_sec = fetch_for_scene(safe_sec, dir='./')
-    orbit_file_sec = orbit_file_sec.name
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        orbit_download_ref = executor.submit(fetch_for_scene, safe_ref, dir='./')
+        orbit_download_sec = executor.submit(fetch_for_scene, safe_sec, dir='./')
+        orbit_file_ref = orbit_download_ref.result().name
+        orbit_file_sec = orbit_download_sec.result().name
 
     burst_ids_ref = get_burst_ids(safe_ref, orbit_file_ref)
     burst_ids_sec = get_burst_ids(safe_sec, orbit_file_sec)
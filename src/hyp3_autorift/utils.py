@@ -1,9 +1,11 @@
 """Helper utilities for autoRIFT"""
 
+import contextlib
+import functools
 import logging
 import os
 from pathlib import Path
-from typing import Tuple, Union
+from typing import Dict, Iterator, Tuple, Union
 
 import boto3
 from hyp3lib import DemError
@@ -15,6 +17,49 @@ from hyp3_autorift.geometry import fix_point_for_antimeridian, flip_point_coordi
 
 log = logging.getLogger(__name__)
 
+# Only while looking up the (remote) parameter shapefile and the DEM it points to (see `find_jpl_parameter_info`):
+#   * don't list the (bucket) directory of every file opened; the shapefile's sidecar files are probed individually
+#   * cache the blocks read from remote files, and don't issue a HEAD request before the first GET of each file
+PARAMETER_FILE_GDAL_CONFIG = {
+    'GDAL_DISABLE_READDIR_ON_OPEN': 'TRUE',
+    'VSI_CACHE': 'TRUE',
+    'CPL_VSIL_CURL_CACHE_SIZE': str(64 * 1024 * 1024),
+    'CPL_VSIL_CURL_USE_HEAD': 'NO',
+}
+
+# Only while processing optical pairs (see `process.process`), whose scenes are all remote and never ENVI:
+#   * skip sidecar probing entirely, and read the requester-pays Landsat bucket
+#   * decode with all cores, cache what's been fetched, and fetch in bigger, merged, multiplexed range requests
+OPTICAL_GDAL_CONFIG = {
+    'GDAL_DISABLE_READDIR_ON_OPEN': 'EMPTY_DIR',
+    'AWS_REGION': 'us-west-2',
+    'AWS_REQUEST_PAYER': 'requester',
+    'GDAL_NUM_THREADS': 'ALL_CPUS',
+    'VSI_CACHE': 'TRUE',
+    'VSI_CACHE_SIZE': str(1_000_000_000),
+    'CPL_VSIL_CURL_CACHE_SIZE': str(64 * 1024 * 1024),
+    # GDAL caps this at 10 MB and quietly falls back to its 16 KB default above that
+    'CPL_VSIL_CURL_CHUNK_SIZE': str(8 * 1024 * 1024),
+    'GDAL_HTTP_MULTIPLEX': 'YES',
+    'GDAL_HTTP_MERGE_CONSECUTIVE_RANGES': 'YES',
+}
+
+
+@contextlib.contextmanager
+def gdal_config_options(options: Dict[str, str]) -> Iterator[None]:
+    """Set GDAL config options process-wide for the duration of the block, then restore their previous values
+
+    Unlike thread-local options, these are seen by worker threads and by the CXX threads in Geogrid/autoRIFT.
+    """
+    previous = {key: gdal.GetConfigOption(key) for key in options}
+    try:
+        for key, value in options.items():
+            gdal.SetConfigOption(key, value)
+        yield
+    finally:
+        for key, value in previous.items():
+            gdal.SetConfigOption(key, value)
+
 
 def upload_file_to_s3_with_publish_access_keys(path_to_file: Path, bucket: str, prefix: str = ''):
     try:
@@ -38,60 +83,83 @@ def upload_file_to_s3_with_publish_access_keys(path_to_file: Path, bucket: str,
     s3_client.put_object_tagging(Bucket=bucket, Key=key, Tagging=tag_set)
 
 
-def find_jpl_parameter_info(polygon: ogr.Geometry, parameter_file: str) -> dict:
+@functools.lru_cache(maxsize=32)
+def get_dem_geotransform(dem: str) -> Tuple[float, ...]:
+    """Get the geotransform of a (likely remote) DEM, reusing the result for repeated lookups within a process"""
+    info = gdal.Info(dem, format='json', showFileList=False, showMetadata=False, showRAT=False, showColorTable=False)
+    return tuple(info['geoTransform'])
+
+
+@functools.lru_cache(maxsize=4)
+def _open_parameter_file(parameter_file: str) -> ogr.DataSource:
+    # Keep the (usually remote) shapefile open for the lifetime of the process so repeated lookups are served
+    # from GDAL's caches instead of new HTTP requests for the .shp, .shx, .dbf, and .prj files
     driver = ogr.GetDriverByName('ESRI Shapefile')
     shapes = driver.Open(parameter_file, gdal.GA_ReadOnly)
+    if shapes is None:
+        # raise rather than return, so a transient failure isn't cached
+        raise OSError(f'Unable to open the parameter file {parameter_file}')
+    return shapes
 
-    parameter_info = None
-    centroid = flip_point_coordinates(polygon.Centroid())
-    centroid = fix_point_for_antimeridian(centroid)
-    for feature in shapes.GetLayer(0):
-        if feature.geometry().Contains(centroid):
-            parameter_info = {
-                'name': f'{feature["name"]}',
-                'epsg': feature['epsg'],
-                'geogrid': {
-                    'dem': f"/vsicurl/{feature['h']}",
-                    'ssm': f"/vsicurl/{feature['StableSurfa']}",
-                    'dhdx': f"/vsicurl/{feature['dhdx']}",
-                    'dhdy': f"/vsicurl/{feature['dhdy']}",
-                    'vx': f"/vsicurl/{feature['vx0']}",
-                    'vy': f"/vsicurl/{feature['vy0']}",
-                    'srx': f"/vsicurl/{feature['vxSearchRan']}",
-                    'sry': f"/vsicurl/{feature['vySearchRan']}",
-                    'csminx': f"/vsicurl/{feature['xMinChipSiz']}",
-                    'csminy': f"/vsicurl/{feature['yMinChipSiz']}",
-                    'csmaxx': f"/vsicurl/{feature['xMaxChipSiz']}",
-                    'csmaxy': f"/vsicurl/{feature['yMaxChipSiz']}",
-                    'sp': f"/vsicurl/{feature['sp']}",
-                    'dhdxs': f"/vsicurl/{feature['dhdxs']}",
-                    'dhdys': f"/vsicurl/{feature['dhdys']}",
-                },
-                'autorift': {
-                    'grid_location': 'window_location.tif',
-                    'init_offset': 'window_offset.tif',
-                    'search_range': 'window_search_range.tif',
-                    'chip_size_min': 'window_chip_size_min.tif',
-                    'chip_size_max': 'window_chip_size_max.tif',
-                    'offset2vx': 'window_rdr_off2vel_x_vec.tif',
-                    'offset2vy': 'window_rdr_off2vel_y_vec.tif',
-                    'stable_surface_mask': 'window_stable_surface_mask.tif',
-                    'scale_factor': 'window_scale_factor.tif',
-                    'mpflag': 0,
+
+def find_jpl_parameter_info(polygon: ogr.Geometry, parameter_file: str) -> dict:
+    with gdal_config_options(PARAMETER_FILE_GDAL_CONFIG):
+        shapes = _open_parameter_file(parameter_file)
+
+        parameter_info = None
+        centroid = flip_point_coordinates(polygon.Centroid())
+        centroid = fix_point_for_antimeridian(centroid)
+
+        # Let OGR skip features whose extent can't contain the centroid so only candidates are checked in Python
+        layer = shapes.GetLayer(0)
+        layer.SetSpatialFilter(centroid)
+        for feature in layer:
+            if feature.geometry().Contains(centroid):
+                parameter_info = {
+                    'name': f'{feature["name"]}',
+                    'epsg': feature['epsg'],
+                    'geogrid': {
+                        'dem': f"/vsicurl/{feature['h']}",
+                        'ssm': f"/vsicurl/{feature['StableSurfa']}",
+                        'dhdx': f"/vsicurl/{feature['dhdx']}",
+                        'dhdy': f"/vsicurl/{feature['dhdy']}",
+                        'vx': f"/vsicurl/{feature['vx0']}",
+                        'vy': f"/vsicurl/{feature['vy0']}",
+                        'srx': f"/vsicurl/{feature['vxSearchRan']}",
+                        'sry': f"/vsicurl/{feature['vySearchRan']}",
+                        'csminx': f"/vsicurl/{feature['xMinChipSiz']}",
+                        'csminy': f"/vsicurl/{feature['yMinChipSiz']}",
+                        'csmaxx': f"/vsicurl/{feature['xMaxChipSiz']}",
+                        'csmaxy': f"/vsicurl/{feature['yMaxChipSiz']}",
+                        'sp': f"/vsicurl/{feature['sp']}",
+                        'dhdxs': f"/vsicurl/{feature['dhdxs']}",
+                        'dhdys': f"/vsicurl/{feature['dhdys']}",
+                    },
+                    'autorift': {
+                        'grid_location': 'window_location.tif',
+                        'init_offset': 'window_offset.tif',
+                        'search_range': 'window_search_range.tif',
+                        'chip_size_min': 'window_chip_size_min.tif',
+                        'chip_size_max': 'window_chip_size_max.tif',
+                        'offset2vx': 'window_rdr_off2vel_x_vec.tif',
+                        'offset2vy': 'window_rdr_off2vel_y_vec.tif',
+                        'stable_surface_mask': 'window_stable_surface_mask.tif',
+                        'scale_factor': 'window_scale_factor.tif',
+                        'mpflag': 0,
+                    }
                 }
-            }
-            break
+                break
 
-    if parameter_info is None:
-        raise DemError('Could not determine appropriate DEM for:\n'
-                       f'    centroid: {centroid}'
-                       f'    using: {parameter_file}')
+        if parameter_info is None:
+            raise DemError('Could not determine appropriate DEM for:\n'
+                           f'    centroid: {centroid}'
+                           f'    using: {parameter_file}')
 
-    dem_geotransform = gdal.Info(parameter_info['geogrid']['dem'], format='json')['geoTransform']
-    parameter_info['xsize'] = abs(dem_geotransform[1])
-    parameter_info['ysize'] = abs(dem_geotransform[5])
+        dem_geotransform = get_dem_geotransform(parameter_info['geogrid']['dem'])
+        parameter_info['xsize'] = abs(dem_geotransform[1])
+        parameter_info['ysize'] = abs(dem_geotransform[5])
 
-    return parameter_info
+        return parameter_info
 
 
 def load_geospatial(infile: str, band: int = 1):
@@ -5,6 +5,7 @@ from unittest import mock
 from unittest.mock import MagicMock, patch
 
 import botocore.exceptions
+import numpy as np
 import pytest
 import requests
 import responses
@@ -179,23 +180,22 @@ def test_get_s2_manifest():
           'S2A_MSIL1C_20160616T112217_N0204_R137_T29QKF_20160617T193500.SAFE/manifest.safe'
     responses.add(responses.GET, url, body='foo', status=200)
 
-    assert process.get_s2_manifest('S2A_MSIL1C_20160616T112217_N0204_R137_T29QKF_20160617T193500') == 'foo'
+    manifest = process.get_s2_manifest('S2A_MSIL1C_20160616T112217_N0204_R137_T29QKF_20160617T193500')
+    assert manifest.read() == b'foo'
 
 
 def test_get_s2_path(test_data_directory):
     scene_name = 'S2A_MSIL1C_20160616T112217_N0204_R137_T29QKF_20160617T193500'
-    with open(f'{test_data_directory}/{scene_name}.manifest.safe', 'r') as f:
-        manifest_text = f.read()
-    path = process.get_s2_path(manifest_text, scene_name)
+    with open(f'{test_data_directory}/{scene_name}.manifest.safe', 'rb') as f:
+        path = process.get_s2_path(f, scene_name)
     assert path == '/vsicurl/https://storage.googleapis.com/gcp-public-data-sentinel-2/tiles/29/Q/KF/' \
                    'S2A_MSIL1C_20160616T112217_N0204_R137_T29QKF_20160617T193500.SAFE/./GRANULE' \
                    '/S2A_OPER_MSI_L1C_TL_SGS__20160616T181414_A005139_T29QKF_N02.04/IMG_DATA' \
                    '/S2A_OPER_MSI_L1C_TL_SGS__20160616T181414_A005139_T29QKF_B08.jp2'
 
     scene_name = 'S2B_MSIL1C_20200419T060719_N0209_R105_T38EMQ_20200419T091056'
-    with open(f'{test_data_directory}/{scene_name}.manifest.safe', 'r') as f:
-        manifest_text = f.read()
-    path = process.get_s2_path(manifest_text, scene_name)
+    with open(f'{test_data_directory}/{scene_name}.manifest.safe', 'rb') as f:
+        path = process.get_s2_path(f, scene_name)
     assert path == '/vsicurl/https://storage.googleapis.com/gcp-public-data-sentinel-2/tiles/38/E/MQ/' \
                    'S2B_MSIL1C_20200419T060719_N0209_R105_T38EMQ_20200419T091056.SAFE/./GRANULE' \
                    '/L1C_T38EMQ_A016290_20200419T060719/IMG_DATA/T38EMQ_20200419T060719_B08.jp2'
@@ -286,6 +286,31 @@ def test_get_datetime():
         process.get_datetime('S3_adsflafjladsf')
 
 
+def test_prepare_array_for_filtering():
+    array = np.array([[1, 2, 3], [0, 5, 0]], dtype=np.uint16)
+    prepared, valid_domain = process.prepare_array_for_filtering(array, nodata=0)
+    assert prepared.dtype == np.float32
+    assert np.array_equal(prepared, [[1, 2, 3], [0, 5, 0]])
+    assert np.array_equal(valid_domain, [[True, True, True], [False, True, False]])
+
+    array = np.array([[1.5, -32767.], [-32767., 4.]], dtype=np.float32)
+    prepared, valid_domain = process.prepare_array_for_filtering(array, nodata=-32767)
+    assert prepared.dtype == np.float32
+    assert np.array_equal(prepared, [[1.5, 0], [0, 4.]])
+    assert np.array_equal(valid_domain, [[True, False], [False, True]])
+
+    array = np.array([[1, 2], [3, 4]], dtype=np.uint16)
+    prepared, valid_domain = process.prepare_array_for_filtering(array, nodata=0)
+    assert prepared.dtype == np.float32
+    assert np.array_equal(prepared, [[1, 2], [3, 4]])
+    assert valid_domain.all()
+
+    array = np.array([[1.5, 2.5], [3.5, 4.5]], dtype=np.float32)
+    prepared, valid_domain = process.prepare_array_for_filtering(array, nodata=0)
+    assert prepared is array
+    assert valid_domain.all()
+
+
 def test_apply_landsat_filtering(monkeypatch):
     def mock_apply_filter_function(scene, _):
         if process.get_platform(scene) < 'L7':
@@ -1,5 +1,6 @@
 import pytest
 from hyp3lib import DemError
+from osgeo import gdal
 
 from hyp3_autorift import geometry, utils
 from hyp3_autorift.process import DEFAULT_PARAMETER_FILE
@@ -71,6 +72,15 @@ def test_find_jpl_parameter_info():
         utils.find_jpl_parameter_info(polygon, DEFAULT_PARAMETER_FILE)
 
 
+def test_find_jpl_parameter_info_missing_file(tmp_path):
+    polygon = geometry.polygon_from_bbox(x_limits=(67, 68), y_limits=(-50, -49))
+    parameter_file = str(tmp_path / 'missing.shp')
+    # RuntimeError when GDAL exceptions are enabled, OSError otherwise; neither may be cached
+    for _ in range(2):
+        with pytest.raises((OSError, RuntimeError)):
+            utils.find_jpl_parameter_info(polygon, parameter_file)
+
+
 def test_find_jpl_parameter_info_antimeridian():
     lat_limits = (54, 55)
     lon_limits = (180, 181)
@@ -119,3 +129,18 @@ def test_find_jpl_parameter_info_antimeridian():
     polygon = geometry.polygon_from_bbox(x_limits=lat_limits, y_limits=lon_limits)
     parameter_info = utils.find_jpl_parameter_info(polygon, DEFAULT_PARAMETER_FILE)
     assert parameter_info['name'] == 'SPS'
+
+
+def test_gdal_config_options():
+    gdal.SetConfigOption('AUTORIFT_TEST_SET', 'before')
+    with utils.gdal_config_options({'AUTORIFT_TEST_SET': 'during', 'AUTORIFT_TEST_UNSET': 'during'}):
+        assert gdal.GetConfigOption('AUTORIFT_TEST_SET') == 'during'
+        assert gdal.GetConfigOption('AUTORIFT_TEST_UNSET') == 'during'
+    assert gdal.GetConfigOption('AUTORIFT_TEST_SET') == 'before'
+    assert gdal.GetConfigOption('AUTORIFT_TEST_UNSET') is None
+
+    with pytest.raises(ValueError):
+        with utils.gdal_config_options({'AUTORIFT_TEST_SET': 'during'}):
+            raise ValueError()
+    assert gdal.GetConfigOption('AUTORIFT_TEST_SET') == 'before'
+    gdal.SetConfigOption('AUTORIFT_TEST_SET', None)